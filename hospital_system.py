@@ -1,389 +1,436 @@
-import uuid
-import datetime
-from typing import Optional, Any, List, Dict
-
-
-# --- 1. LINKED LIST IMPLEMENTATION (FOR PATIENT QUEUE) ---
-
-class PatientNode:
-    """Represents a patient in the queue."""
-
-    def __init__(self, patient_id: str, name: str, condition: str):
-        self.patient_id = patient_id
-        self.name = name
-        self.condition = condition
-        self.next: Optional['PatientNode'] = None
-
-    def to_dict(self) -> Dict[str, str]:
-        """Converts patient data to a dictionary for API response."""
-        return {"id": self.patient_id, "name": self.name, "condition": self.condition}
-
-
-class PatientQueue:
-    """Implements a FIFO Queue using a Linked List."""
-
-    def __init__(self):
-        self.head: Optional[PatientNode] = None
-        self.tail: Optional[PatientNode] = None
-        self.size: int = 0
-
-    def is_empty(self) -> bool:
-        return self.head is None
-
-    def enqueue(self, name: str, condition: str) -> PatientNode:
-        """Adds a new patient to the end of the queue (tail)."""
-        patient_id = str(uuid.uuid4())[:8]  # Generate a unique, short ID
-        new_patient = PatientNode(patient_id, name, condition)
-
-        if self.is_empty():
-            self.head = new_patient
-            self.tail = new_patient
-        else:
-            if self.tail:
-                self.tail.next = new_patient
-            self.tail = new_patient
-
-        self.size += 1
-        return new_patient
-
-    def dequeue(self) -> Optional[PatientNode]:
-        """Removes and returns the next patient to be treated (head)."""
-        if self.is_empty():
-            return None
-
-        patient_to_treat = self.head
-        self.head = self.head.next
-
-        if self.head is None:
-            self.tail = None
-
-        self.size -= 1
-        return patient_to_treat
-
-    def to_list(self) -> List[Dict[str, str]]:
-        """Returns all patients in the queue as a list of dictionaries."""
-        patients = []
-        current = self.head
-        while current:
-            patients.append(current.to_dict())
-            current = current.next
-        return patients
-
-
-# --- 2. STACK IMPLEMENTATION (FOR TREATMENT HISTORY) ---
-
-class TreatmentStack:
-    """Implements a LIFO Stack for treatment history."""
-
-    def __init__(self):
-        self._items: List[dict] = []
-        self.patient_id: Optional[str] = None  # Stores the ID of the patient this stack belongs to
-        self.initial_condition: str = ""
-        self.status: str = "Waiting"
-        self.assigned_doctor: Optional[str] = None
-
-    def push(self, treatment_detail: str):
-        """Adds a new treatment record to the stack."""
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self._items.append({
-            "timestamp": timestamp,
-            "detail": treatment_detail
-        })
-
-    def pop(self) -> Optional[dict]:
-        """Removes and returns the last treatment (undo feature)."""
-        if not self._items:
-            return None
-
-        return self._items.pop()
-
-    def get_history(self) -> List[dict]:
-        """Returns the full treatment history (the underlying list)."""
-        return self._items
-
-    def to_dict(self) -> Dict[str, Any]:
-        """Returns the full record state."""
-        return {
-            "patient_id": self.patient_id,
-            "condition": self.initial_condition,
-            "status": self.status,
-            "assigned_doctor": self.assigned_doctor,
-            "treatment_history": self._items
-        }
-
-
-# --- 3. TREE IMPLEMENTATION (FOR DOCTOR SPECIALIZATIONS) ---
-
-class SpecializationNode:
-    """Represents a department or specialization in the Tree hierarchy."""
-
-    def __init__(self, name: str):
-        self.name = name
-        # Stores doctors as a dictionary {name: description} internally
-        self.doctors: Dict[str, str] = {}
-        self.children: List['SpecializationNode'] = []
-
-    def to_dict(self) -> Dict[str, Any]:
-        """
-        Converts the node and its children to a dictionary for JSON output.
-        IMPORTANT CHANGE: Transforms the internal doctors dictionary into a
-        list of objects to make it iterable for the frontend.
-        """
-        doctor_list = [
-            {"name": name, "description": desc}
-            for name, desc in self.doctors.items()
-        ]
-
-        return {
-            "name": self.name,
-            "doctors": doctor_list,  # Now returns a list of objects
-            "children": [child.to_dict() for child in self.children]
-        }
-
-
-class SpecializationTree:
-    """Implements a Tree to organize hospital departments."""
-
-    def __init__(self, hospital_name: str):
-        self.root = SpecializationNode(hospital_name)
-        self._seed_structure()
-
-    def _seed_structure(self):
-        """Initializes a basic hospital hierarchy with Filipino doctors and descriptions."""
-        root_name = self.root.name
-
-        # Level 1: Major Departments
-        self.add_specialization(root_name, "Emergency")
-        self.add_specialization(root_name, "Internal Medicine")
-        self.add_specialization(root_name, "Surgery")
-
-        # Level 2: Sub-specialties
-        self.add_specialization("Internal Medicine", "Cardiology")
-        self.add_specialization("Internal Medicine", "Dermatology")
-        self.add_specialization("Internal Medicine", "Pediatrics")
-        self.add_specialization("Surgery", "Orthopedics")
-
-        # Level 3: Further Sub-specialties
-        self.add_specialization("Cardiology", "Electrophysiology")
-        self.add_specialization("Orthopedics", "Sports Medicine")
-        self.add_specialization("Emergency", "Trauma")
-
-        # Assign Filipino Doctors (Dr. / Dra. titles used) with descriptions
-
-        # Emergency Department Doctors (Level 1)
-        self.assign_doctor("Emergency", "Dr. Ramon Cruz", "Specializes in immediate care and triage management.")
-        self.assign_doctor("Emergency", "Dra. Sofia Reyes", "Lead physician for non-critical emergency cases.")
-
-        # Trauma Doctors (Level 3)
-        self.assign_doctor("Trauma", "Dr. Paolo Ocampo",
-                           "Expert in severe physical injury and complex trauma protocols.")
-        self.assign_doctor("Trauma", "Dra. Lea Perez",
-                           "Focuses on stabilization and surgical planning for acute trauma.")
-
-        # Internal Medicine Doctors (Level 1)
-        self.assign_doctor("Internal Medicine", "Dr. Antonio Dizon",
-                           "General internal medicine and chronic disease management.")
-        self.assign_doctor("Internal Medicine", "Dra. Maria Santos",
-                           "Focuses on diagnostic challenges and long-term adult care.")
-
-        # Cardiology Doctors (Level 2)
-        self.assign_doctor("Cardiology", "Dr. Jose Garcia", "Non-invasive cardiology and heart disease prevention.")
-
-        # Electrophysiology Doctors (Level 3)
-        self.assign_doctor("Electrophysiology", "Dra. Christine Lopez",
-                           "Specialist in heart rhythm disorders and pacemaker implantation.")
-
-        # Dermatology Doctors (Level 2)
-        self.assign_doctor("Dermatology", "Dra. Elena Mendoza",
-                           "Expert in complex skin conditions and dermatological procedures.")
-
-        # Pediatrics Doctors (Level 2)
-        self.assign_doctor("Pediatrics", "Dra. Leila Gonzales",
-                           "Dedicated to pediatric primary care and infectious diseases in children.")
-
-        # Surgery Department Doctors (Level 1)
-        self.assign_doctor("Surgery", "Dr. Roberto Lim",
-                           "General surgeon with focus on abdominal and soft tissue procedures.")
-
-        # Orthopedics Doctors (Level 2)
-        self.assign_doctor("Orthopedics", "Dra. Carmen Ramos",
-                           "Specialist in joint replacement and geriatric orthopedic care.")
-
-        # Sports Medicine Doctors (Level 3)
-        self.assign_doctor("Sports Medicine", "Dr. Miguel Dela Cruz",
-                           "Expert in musculoskeletal injuries and rehabilitation.")
-
-    def add_specialization(self, parent_name: str, child_name: str) -> bool:
-        """Adds a new department/specialization under a parent node."""
-        parent_node = self._find_node(self.root, parent_name)
-        if parent_node:
-            new_node = SpecializationNode(child_name)
-            parent_node.children.append(new_node)
-            return True
-        return False
-
-    def assign_doctor(self, specialization_name: str, doctor_name: str, description: str) -> bool:
-        """
-        Assigns a doctor and their description to a specialization.
-        """
-        node = self._find_node(self.root, specialization_name)
-        if node:
-            node.doctors[doctor_name] = description  # Stores as key-value pair
-            return True
-        return False
-
-    def _find_node(self, current_node: SpecializationNode, name: str) -> Optional[SpecializationNode]:
-        """Helper function for Depth-First Search (DFS) to find a node by name."""
-        if current_node.name.lower() == name.lower():
-            return current_node
-
-        for child in current_node.children:
-            result = self._find_node(child, name)
-            if result:
-                return result
-        return None
-
-
-# --- 4. INTEGRATED HOSPITAL MANAGEMENT SYSTEM ---
-
-class HospitalManagementSystem:
-    """
-    The main system class integrating the three data structures.
-    Manages the state of the hospital demo.
-    """
-
-    def __init__(self, hospital_name="City General Hospital"):
-        self.hospital_name = hospital_name
-        self.patient_queue = PatientQueue()
-        # Stores all patients who have ever been registered (including those treated/waiting)
-        self.patient_records: dict[str, TreatmentStack] = {}
-        self.specializations = SpecializationTree(hospital_name)
-        self.current_treatment_id: Optional[str] = None
-        self.current_patient_name: Optional[str] = None
-        self.current_patient_condition: Optional[str] = None
-        self.current_patient_doctor: Optional[str] = None
-
-        # --- Pre-load some patients for the demo ---
-        p1 = self.patient_queue.enqueue("Alice Johnson", "Severe fever")
-        p2 = self.patient_queue.enqueue("Bob Davis", "Broken arm")
-        self.patient_records[p1.patient_id] = TreatmentStack()
-        self.patient_records[p1.patient_id].patient_id = p1.patient_id
-        self.patient_records[p1.patient_id].initial_condition = p1.condition
-        self.patient_records[p2.patient_id] = TreatmentStack()
-        self.patient_records[p2.patient_id].patient_id = p2.patient_id
-        self.patient_records[p2.patient_id].initial_condition = p2.condition
-
-    def register_patient(self, name: str, condition: str) -> str:
-        """Adds a new patient to the queue and creates a record."""
-        new_patient = self.patient_queue.enqueue(name, condition)
-
-        new_record = TreatmentStack()
-        new_record.patient_id = new_patient.patient_id
-        new_record.initial_condition = condition
-        self.patient_records[new_patient.patient_id] = new_record
-        return new_patient.patient_id
-
-    def treat_next_patient(self) -> Optional[str]:
-        """Moves the next patient from the queue to the current treatment slot."""
-        patient = self.patient_queue.dequeue()
-
-        # Reset current treatment slot
-        self.current_treatment_id = None
-        self.current_patient_name = None
-        self.current_patient_condition = None
-        self.current_patient_doctor = None
-
-        if patient:
-            self.current_treatment_id = patient.patient_id
-            self.current_patient_name = patient.name
-            self.current_patient_condition = patient.condition
-
-            # Update status in the records
-            record = self.patient_records[patient.patient_id]
-            record.status = "In Treatment"
-
-            # Auto-add initial triage step
-            record.push(f"Initial Triage for {patient.condition}.")
-
-            return patient.patient_id
-        return None
-
-    def add_treatment_step(self, detail: str) -> bool:
-        """Adds a treatment step to the currently treated patient's stack."""
-        if not self.current_treatment_id:
-            return False
-
-        record = self.patient_records[self.current_treatment_id]
-        record.push(detail)
-        return True
-
-    def undo_last_treatment(self) -> bool:
-        """Undoes the last treatment using the Stack's pop operation."""
-        if not self.current_treatment_id:
-            return False
-
-        record = self.patient_records[self.current_treatment_id]
-        return record.pop() is not None
-
-    def get_status_data(self) -> Dict[str, Any]:
-        """Returns the overall system status for UI update."""
-        current_record = self.patient_records.get(self.current_treatment_id)
-
-        return {
-            "queue_size": self.patient_queue.size,
-            "queue_data": self.patient_queue.to_list(),
-            "current_patient_id": self.current_treatment_id,
-            "current_patient_name": self.current_patient_name,
-            "current_patient_condition": self.current_patient_condition,
-            "assigned_doctor": current_record.assigned_doctor if current_record else None,
-            "history_data": current_record.get_history() if current_record else []
-        }
-
-    def get_specialization_tree_data(self) -> Dict[str, Any]:
-        """Returns the tree structure for rendering."""
-        return {"tree_data": self.specializations.root.to_dict()}
-
-    def get_patient_record(self, patient_id: str) -> Optional[Dict[str, Any]]:
-        """Retrieves a full patient record by ID."""
-        record = self.patient_records.get(patient_id)
-        if not record:
-            return None
-
-        # In a real system, you'd have multiple visits. For this demo,
-        # we treat the single TreatmentStack as the patient's current visit.
-        # We wrap it in a 'full_visits' array for future expansion.
-        return {
-            "id": patient_id,
-            "name": self.get_patient_name_by_id(patient_id),
-            "full_visits": [{
-                "registration_time": record.get_history()[0]['timestamp'] if record.get_history() else 'N/A',
-                "condition": record.initial_condition,
-                "status": record.status,
-                "assigned_doctor": record.assigned_doctor,
-                "treatment_history": record.get_history(),
-            }]
-        }
-
-    def get_patient_name_by_id(self, patient_id: str) -> str:
-        """Tries to find the patient name based on their ID."""
-        # This is a hack for the demo since patient data is spread.
-        # Try to find it in the queue first
-        current = self.patient_queue.head
-        while current:
-            if current.patient_id == patient_id:
-                return current.name
-            current = current.next
-
-        # If not in the queue, we can't easily retrieve the name from just the stack object
-        # In a real system, this would be retrieved from a main patient database/table.
-        # For simplicity, we just use a placeholder if not found in the queue.
-        return f"Patient {patient_id}"
-
-    def assign_doctor_to_current(self, doctor_name: str) -> bool:
-        """Assigns a doctor to the currently treated patient."""
-        if not self.current_treatment_id:
-            return False
-
-        record = self.patient_records[self.current_treatment_id]
-        record.assigned_doctor = doctor_name
-        return True
\ No newline at end of file
+import collections
+import hashlib
+import os
+import datetime
+import threading
+from typing import Deque, Optional, Any, List, Dict
+
+import orjson
+
+# This module is fully annotated so it can optionally be AOT-compiled with
+# mypyc (`pip install mypy && mypyc hospital_system.py`); app.py's import then
+# picks up the compiled extension transparently.
+
+
+# --- 1. QUEUE IMPLEMENTATION (FOR PATIENT QUEUE) ---
+
+class PatientQueue:
+    """Implements a FIFO Queue using a collections.deque of patient dicts."""
+
+    def __init__(self) -> None:
+        # Each entry is a {"id", "name", "condition"} dict, already in the
+        # shape the API responses need.
+        self._dq: Deque[Dict[str, str]] = collections.deque()
+        # Serialized snapshot reused across status polls until the queue changes
+        self._list_cache: Optional[List[Dict[str, str]]] = None
+
+    def is_empty(self) -> bool:
+        return not self._dq
+
+    @property
+    def size(self) -> int:
+        return len(self._dq)
+
+    def enqueue(self, name: str, condition: str) -> Dict[str, str]:
+        """Adds a new patient to the end of the queue (tail)."""
+        patient_id = os.urandom(4).hex()  # Generate a unique, short ID
+        new_patient = {"id": patient_id, "name": name, "condition": condition}
+        self._dq.append(new_patient)
+        self._list_cache = None
+        return new_patient
+
+    def dequeue(self) -> Optional[Dict[str, str]]:
+        """Removes and returns the next patient to be treated (head)."""
+        if not self._dq:
+            return None
+        self._list_cache = None
+        return self._dq.popleft()
+
+    def to_list(self) -> List[Dict[str, str]]:
+        """
+        Returns all patients in the queue as a list of dictionaries.
+        The list is cached between mutations and is meant to be read-only
+        (it feeds straight into JSON responses).
+        """
+        if self._list_cache is None:
+            self._list_cache = list(self._dq)
+        return self._list_cache
+
+
+# --- 2. STACK IMPLEMENTATION (FOR TREATMENT HISTORY) ---
+
+class TreatmentStack:
+    """Implements a LIFO Stack for treatment history."""
+
+    __slots__ = ("_items", "patient_id", "patient_name", "initial_condition",
+                 "status", "assigned_doctor")
+
+    def __init__(self) -> None:
+        # deque pops are O(1) at either end with no resize copies on growth
+        self._items: Deque[Dict[str, str]] = collections.deque()
+        self.patient_id: Optional[str] = None  # Stores the ID of the patient this stack belongs to
+        self.patient_name: Optional[str] = None
+        self.initial_condition: str = ""
+        self.status: str = "Waiting"
+        self.assigned_doctor: Optional[str] = None
+
+    def push(self, treatment_detail: str) -> None:
+        """Adds a new treatment record to the stack."""
+        # isoformat is implemented in C and much cheaper than strftime
+        timestamp = datetime.datetime.now().isoformat(sep=' ', timespec='seconds')
+        self._items.append({
+            "timestamp": timestamp,
+            "detail": treatment_detail
+        })
+
+    def pop(self) -> Optional[Dict[str, str]]:
+        """Removes and returns the last treatment (undo feature)."""
+        return self._items.pop() if self._items else None
+
+    def get_history(self) -> List[Dict[str, str]]:
+        """
+        Returns the full treatment history as a point-in-time list snapshot.
+        Callers must treat it as read-only; later pushes/pops do not alter
+        an already-returned snapshot.
+        """
+        return list(self._items)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the full record state."""
+        return {
+            "patient_id": self.patient_id,
+            "condition": self.initial_condition,
+            "status": self.status,
+            "assigned_doctor": self.assigned_doctor,
+            "treatment_history": list(self._items)
+        }
+
+
+# --- 3. TREE IMPLEMENTATION (FOR DOCTOR SPECIALIZATIONS) ---
+
+class SpecializationNode:
+    """Represents a department or specialization in the Tree hierarchy."""
+
+    __slots__ = ("name", "doctors", "_doctor_index", "children")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        # Doctors are stored directly as the list of {"name", "description"}
+        # objects the frontend consumes; the index keeps names unique.
+        self.doctors: List[Dict[str, str]] = []
+        self._doctor_index: Dict[str, int] = {}
+        self.children: List['SpecializationNode'] = []
+
+    def add_doctor(self, doctor_name: str, description: str) -> None:
+        """Adds a doctor, updating the description if the name already exists."""
+        pos = self._doctor_index.get(doctor_name)
+        if pos is not None:
+            self.doctors[pos]["description"] = description
+        else:
+            self._doctor_index[doctor_name] = len(self.doctors)
+            self.doctors.append({"name": doctor_name, "description": description})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Converts the node and its children to a dictionary for JSON output.
+        The doctors list is returned by reference (read-only by convention),
+        already in the iterable shape the frontend needs.
+        """
+        return {
+            "name": self.name,
+            "doctors": self.doctors,
+            "children": [child.to_dict() for child in self.children]
+        }
+
+
+class SpecializationTree:
+    """Implements a Tree to organize hospital departments."""
+
+    def __init__(self, hospital_name: str) -> None:
+        self.root = SpecializationNode(hospital_name)
+        # Case-insensitive name -> node index so lookups avoid a tree walk
+        self._index: Dict[str, SpecializationNode] = {self.root.name.lower(): self.root}
+        # Serialized forms are cached since the tree rarely changes after seeding
+        self._cached_dict: Optional[Dict[str, Any]] = None
+        self._cached_json: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._seed_structure()
+        # Warm the caches now (i.e. at app import time) so the first
+        # /api/specializations response is served from pre-built bytes
+        self.to_json_bytes()
+
+    def _seed_structure(self) -> None:
+        """Initializes a basic hospital hierarchy with Filipino doctors and descriptions."""
+        root_name = self.root.name
+
+        # Level 1: Major Departments
+        self.add_specialization(root_name, "Emergency")
+        self.add_specialization(root_name, "Internal Medicine")
+        self.add_specialization(root_name, "Surgery")
+
+        # Level 2: Sub-specialties
+        self.add_specialization("Internal Medicine", "Cardiology")
+        self.add_specialization("Internal Medicine", "Dermatology")
+        self.add_specialization("Internal Medicine", "Pediatrics")
+        self.add_specialization("Surgery", "Orthopedics")
+
+        # Level 3: Further Sub-specialties
+        self.add_specialization("Cardiology", "Electrophysiology")
+        self.add_specialization("Orthopedics", "Sports Medicine")
+        self.add_specialization("Emergency", "Trauma")
+
+        # Assign Filipino Doctors (Dr. / Dra. titles used) with descriptions
+
+        # Emergency Department Doctors (Level 1)
+        self.assign_doctor("Emergency", "Dr. Ramon Cruz", "Specializes in immediate care and triage management.")
+        self.assign_doctor("Emergency", "Dra. Sofia Reyes", "Lead physician for non-critical emergency cases.")
+
+        # Trauma Doctors (Level 3)
+        self.assign_doctor("Trauma", "Dr. Paolo Ocampo",
+                           "Expert in severe physical injury and complex trauma protocols.")
+        self.assign_doctor("Trauma", "Dra. Lea Perez",
+                           "Focuses on stabilization and surgical planning for acute trauma.")
+
+        # Internal Medicine Doctors (Level 1)
+        self.assign_doctor("Internal Medicine", "Dr. Antonio Dizon",
+                           "General internal medicine and chronic disease management.")
+        self.assign_doctor("Internal Medicine", "Dra. Maria Santos",
+                           "Focuses on diagnostic challenges and long-term adult care.")
+
+        # Cardiology Doctors (Level 2)
+        self.assign_doctor("Cardiology", "Dr. Jose Garcia", "Non-invasive cardiology and heart disease prevention.")
+
+        # Electrophysiology Doctors (Level 3)
+        self.assign_doctor("Electrophysiology", "Dra. Christine Lopez",
+                           "Specialist in heart rhythm disorders and pacemaker implantation.")
+
+        # Dermatology Doctors (Level 2)
+        self.assign_doctor("Dermatology", "Dra. Elena Mendoza",
+                           "Expert in complex skin conditions and dermatological procedures.")
+
+        # Pediatrics Doctors (Level 2)
+        self.assign_doctor("Pediatrics", "Dra. Leila Gonzales",
+                           "Dedicated to pediatric primary care and infectious diseases in children.")
+
+        # Surgery Department Doctors (Level 1)
+        self.assign_doctor("Surgery", "Dr. Roberto Lim",
+                           "General surgeon with focus on abdominal and soft tissue procedures.")
+
+        # Orthopedics Doctors (Level 2)
+        self.assign_doctor("Orthopedics", "Dra. Carmen Ramos",
+                           "Specialist in joint replacement and geriatric orthopedic care.")
+
+        # Sports Medicine Doctors (Level 3)
+        self.assign_doctor("Sports Medicine", "Dr. Miguel Dela Cruz",
+                           "Expert in musculoskeletal injuries and rehabilitation.")
+
+    def add_specialization(self, parent_name: str, child_name: str) -> bool:
+        """Adds a new department/specialization under a parent node."""
+        parent_node = self._index.get(parent_name.lower())
+        if parent_node:
+            new_node = SpecializationNode(child_name)
+            parent_node.children.append(new_node)
+            self._index[child_name.lower()] = new_node
+            self._invalidate_cache()
+            return True
+        return False
+
+    def assign_doctor(self, specialization_name: str, doctor_name: str, description: str) -> bool:
+        """
+        Assigns a doctor and their description to a specialization.
+        """
+        node = self._index.get(specialization_name.lower())
+        if node:
+            node.add_doctor(doctor_name, description)
+            self._invalidate_cache()
+            return True
+        return False
+
+    def _invalidate_cache(self) -> None:
+        """Drops the cached serializations after a mutation."""
+        self._cached_dict = None
+        self._cached_json = None
+        self._etag = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the serialized tree, rebuilt only after a mutation."""
+        if self._cached_dict is None:
+            self._cached_dict = self.root.to_dict()
+        return self._cached_dict
+
+    def to_json_bytes(self) -> bytes:
+        """Returns the pre-encoded JSON body for the specializations API."""
+        if self._cached_json is None:
+            self._cached_json = orjson.dumps({"tree_data": self.to_dict()})
+        return self._cached_json
+
+    def etag(self) -> str:
+        """Returns a content hash of the serialized tree for HTTP caching."""
+        if self._etag is None:
+            self._etag = hashlib.blake2b(self.to_json_bytes(), digest_size=8).hexdigest()
+        return self._etag
+
+
+# --- 4. INTEGRATED HOSPITAL MANAGEMENT SYSTEM ---
+
+class HospitalManagementSystem:
+    """
+    The main system class integrating the three data structures.
+    Manages the state of the hospital demo.
+    """
+
+    def __init__(self, hospital_name: str = "City General Hospital") -> None:
+        self.hospital_name = hospital_name
+        # Serializes mutations, since the WSGI server handles requests concurrently
+        self._lock = threading.Lock()
+        # Bumped by every mutation; /api/status uses it as a cheap ETag
+        self.version: int = 0
+        self.patient_queue = PatientQueue()
+        # Stores all patients who have ever been registered (including those treated/waiting)
+        self.patient_records: dict[str, TreatmentStack] = {}
+        # Maps patient_id -> name for O(1) lookups without walking the queue
+        self._patient_names: dict[str, str] = {}
+        # Maps patient_id -> registered condition so records can be built lazily
+        self._patient_conditions: dict[str, str] = {}
+        self.specializations = SpecializationTree(hospital_name)
+        self.current_treatment_id: Optional[str] = None
+        self.current_patient_name: Optional[str] = None
+        self.current_patient_condition: Optional[str] = None
+        self.current_patient_doctor: Optional[str] = None
+
+        # --- Pre-load some patients for the demo ---
+        self.register_patient("Alice Johnson", "Severe fever")
+        self.register_patient("Bob Davis", "Broken arm")
+
+    def register_patient(self, name: str, condition: str) -> str:
+        """Adds a new patient to the queue; the record is created lazily."""
+        with self._lock:
+            new_patient = self.patient_queue.enqueue(name, condition)
+
+            # The TreatmentStack itself is only allocated once the patient
+            # is actually treated (see _get_or_create_record)
+            self._patient_names[new_patient["id"]] = name
+            self._patient_conditions[new_patient["id"]] = condition
+            self.version += 1
+            return new_patient["id"]
+
+    def _get_or_create_record(self, patient_id: str) -> TreatmentStack:
+        """Returns the patient's record, creating it on first use."""
+        record = self.patient_records.get(patient_id)
+        if record is None:
+            record = TreatmentStack()
+            record.patient_id = patient_id
+            record.patient_name = self._patient_names.get(patient_id)
+            record.initial_condition = self._patient_conditions.get(patient_id, "")
+            self.patient_records[patient_id] = record
+        return record
+
+    def treat_next_patient(self) -> Optional[str]:
+        """Moves the next patient from the queue to the current treatment slot."""
+        with self._lock:
+            self.version += 1
+            patient = self.patient_queue.dequeue()
+
+            # Reset current treatment slot
+            self.current_treatment_id = None
+            self.current_patient_name = None
+            self.current_patient_condition = None
+            self.current_patient_doctor = None
+
+            if patient:
+                self.current_treatment_id = patient["id"]
+                self.current_patient_name = patient["name"]
+                self.current_patient_condition = patient["condition"]
+
+                # Update status in the records
+                record = self._get_or_create_record(patient["id"])
+                record.status = "In Treatment"
+
+                # Auto-add initial triage step
+                record.push(f"Initial Triage for {patient['condition']}.")
+
+                return patient["id"]
+            return None
+
+    def add_treatment_step(self, detail: str) -> bool:
+        """Adds a treatment step to the currently treated patient's stack."""
+        with self._lock:
+            if not self.current_treatment_id:
+                return False
+
+            record = self.patient_records[self.current_treatment_id]
+            record.push(detail)
+            self.version += 1
+            return True
+
+    def undo_last_treatment(self) -> bool:
+        """Undoes the last treatment using the Stack's pop operation."""
+        with self._lock:
+            if not self.current_treatment_id:
+                return False
+
+            record = self.patient_records[self.current_treatment_id]
+            self.version += 1
+            return record.pop() is not None
+
+    def get_status_data(self) -> Dict[str, Any]:
+        """Returns the overall system status for UI update."""
+        current_record = self.patient_records.get(self.current_treatment_id)
+
+        return {
+            "queue_size": self.patient_queue.size,
+            "queue_data": self.patient_queue.to_list(),
+            "current_patient_id": self.current_treatment_id,
+            "current_patient_name": self.current_patient_name,
+            "current_patient_condition": self.current_patient_condition,
+            "assigned_doctor": current_record.assigned_doctor if current_record else None,
+            "history_data": current_record.get_history() if current_record else []
+        }
+
+    def get_specialization_tree_data(self) -> Dict[str, Any]:
+        """Returns the tree structure for rendering."""
+        return {"tree_data": self.specializations.to_dict()}
+
+    def get_patient_record(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieves a full patient record by ID."""
+        # Materializing the record mutates patient_records, so take the lock
+        # here rather than inside _get_or_create_record (treat_next_patient
+        # calls the helper while already holding it)
+        with self._lock:
+            if patient_id not in self.patient_records and patient_id not in self._patient_names:
+                return None
+            # Untreated patients get their (empty) record materialized here
+            record = self._get_or_create_record(patient_id)
+
+        # In a real system, you'd have multiple visits. For this demo,
+        # we treat the single TreatmentStack as the patient's current visit.
+        # We wrap it in a 'full_visits' array for future expansion.
+        history = record.get_history()
+        return {
+            "id": patient_id,
+            "name": self.get_patient_name_by_id(patient_id),
+            "full_visits": [{
+                "registration_time": history[0]['timestamp'] if history else 'N/A',
+                "condition": record.initial_condition,
+                "status": record.status,
+                "assigned_doctor": record.assigned_doctor,
+                "treatment_history": history,
+            }]
+        }
+
+    def get_patient_name_by_id(self, patient_id: str) -> str:
+        """Looks up the patient name for an ID via the name index."""
+        # In a real system, this would be retrieved from a main patient
+        # database/table. For simplicity, we use a placeholder if unknown.
+        return self._patient_names.get(patient_id, f"Patient {patient_id}")
+
+    def assign_doctor_to_current(self, doctor_name: str) -> bool:
+        """Assigns a doctor to the currently treated patient."""
+        with self._lock:
+            if not self.current_treatment_id:
+                return False
+
+            record = self.patient_records[self.current_treatment_id]
+            record.assigned_doctor = doctor_name
+            self.version += 1
+            return True
\ No newline at end of file